@@ -0,0 +1,187 @@
+"""
+Canonical serialization, content hashing and ETags for schema_manager models.
+
+Usage:
+from schema_manager.hashing import HashCache, VOLATILE_FIELDS, etag_matches
+
+hashes = HashCache()
+etag = hashes.make_etag(paper, exclude=VOLATILE_FIELDS)
+if etag_matches(request.headers.get("If-None-Match"), etag):
+    ...  # respond with 304 Not Modified
+"""
+
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timezone
+from enum import Enum
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Fields that change on every read and should not invalidate a cached response
+VOLATILE_FIELDS = frozenset({"views"})
+
+# Significant digits kept when normalizing floats
+FLOAT_PRECISION = 12
+
+
+def _normalize_datetime(value: datetime) -> str:
+    """Render a datetime as an ISO 8601 UTC string. Naive values are assumed to be UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    else:
+        value = value.astimezone(timezone.utc)
+    return value.replace(tzinfo=None).isoformat() + "Z"
+
+
+def _normalize_float(value: float) -> Any:
+    """Round a float to FLOAT_PRECISION significant digits. Non-finite floats are rejected."""
+    if math.isnan(value) or math.isinf(value):
+        raise ValueError("Cannot canonicalize non-finite float %r" % value)
+    value = float(format(value, ".%dg" % FLOAT_PRECISION))
+    return 0.0 if value == 0 else value
+
+
+def normalize_scalar(value: Any) -> Any:
+    """Return the canonical JSON-compatible form of a scalar (enum, float, datetime, ...)."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, Enum):
+        return normalize_scalar(value.value)
+    if isinstance(value, float):
+        return _normalize_float(value)
+    if isinstance(value, datetime):
+        return _normalize_datetime(value)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _model_fields(model: BaseModel, exclude: FrozenSet[str]) -> Iterable[str]:
+    return sorted(name for name in model.__fields__ if name not in exclude)
+
+
+def _canonical(value: Any, exclude: FrozenSet[str]) -> Any:
+    if isinstance(value, BaseModel):
+        return {name: _canonical(getattr(value, name), exclude) for name in _model_fields(value, exclude)}
+    if isinstance(value, dict):
+        return {str(key): _canonical(item, exclude) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item, exclude) for item in value]
+    if isinstance(value, (set, frozenset)):
+        items = [_canonical(item, exclude) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+    return normalize_scalar(value)
+
+
+def canonical_dict(model: BaseModel, exclude: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Return a JSON-compatible dict of a model with normalized datetimes, floats and enums.
+
+    Field names in `exclude` are dropped from the model and from every nested model.
+    """
+    return _canonical(model, frozenset(exclude or ()))
+
+
+def canonical_json(model: BaseModel, exclude: Optional[Iterable[str]] = None) -> str:
+    """Return the canonical JSON serialization of a model with stable key order."""
+    return json.dumps(
+        canonical_dict(model, exclude),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def content_hash(model: BaseModel, exclude: Optional[Iterable[str]] = None) -> str:
+    """Return a hex SHA-256 hash of the canonical JSON of a model.
+
+    The hash depends only on the canonical content of the model, so it is stable across
+    key order, datetime timezone representation and float noise.
+    """
+    return hashlib.sha256(canonical_json(model, exclude).encode()).hexdigest()
+
+
+def _format_etag(digest: str, weak: bool) -> str:
+    etag = '"%s"' % digest
+    return "W/" + etag if weak else etag
+
+
+def make_etag(model: BaseModel, exclude: Optional[Iterable[str]] = None, weak: bool = False) -> str:
+    """Return a quoted HTTP ETag for a model."""
+    return _format_etag(content_hash(model, exclude), weak)
+
+
+def _version_key(model: BaseModel, exclude: FrozenSet[str]) -> Optional[Tuple[Any, ...]]:
+    model_id = getattr(model, "id", None)
+    updated_at = getattr(model, "updated_at", None)
+    if model_id is None or updated_at is None:
+        return None
+    return (type(model), model_id, normalize_scalar(updated_at), exclude)
+
+
+class HashCache:
+    """Thread-safe LRU cache of content hashes keyed on a model's version stamp.
+
+    The key is (model type, id, updated_at, exclude), which survives reloading a model
+    from the database, so an unchanged PaperResponse or IdeaTask is not re-serialized on
+    every request. Models without an id and updated_at are hashed directly.
+
+    Only correct while writers bump updated_at on every change to the hashed fields;
+    exclude fields that change without it, such as views (see VOLATILE_FIELDS).
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def content_hash(self, model: BaseModel, exclude: Optional[Iterable[str]] = None) -> str:
+        """Return the content hash of a model, reusing it while the version stamp is unchanged."""
+        exclude = frozenset(exclude or ())
+        key = _version_key(model, exclude)
+        if key is None:
+            return content_hash(model, exclude)
+        with self._lock:
+            digest = self._data.get(key)
+            if digest is not None:
+                self._data.move_to_end(key)
+                return digest
+        digest = content_hash(model, exclude)
+        with self._lock:
+            self._data[key] = digest
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return digest
+
+    def make_etag(self, model: BaseModel, exclude: Optional[Iterable[str]] = None, weak: bool = False) -> str:
+        """Return a quoted HTTP ETag for a model."""
+        return _format_etag(self.content_hash(model, exclude), weak)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag using weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
@@ -0,0 +1,251 @@
+"""
+Delta-encoded progress events for in-flight IdeaTask generation.
+
+Instead of polling the full IdeaTask, clients receive ordered events describing what
+changed since their last sequence number and rebuild the task with a reducer.
+
+Usage:
+from schema_manager.idea_events import IdeaTaskEventEncoder, IdeaTaskReducer
+
+# Backend, whenever the task is updated
+encoder = IdeaTaskEventEncoder(task.task_id)
+events = encoder.encode(task)
+# Backend, when a client polls from its last position
+events = encoder.events_since(last_seq, last_epoch)
+
+# Client
+reducer = IdeaTaskReducer()
+reducer.apply_all(events)
+task = reducer.task
+"""
+
+import copy
+import uuid
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from schema_manager.idea import FollowUpQuestion, IdeaTask, SimilarPaper
+
+# IdeaTask list fields that only grow while a task is generating
+_APPEND_FIELDS = ("ideas", "similar_papers", "follow_up_questions")
+
+
+class IdeaTaskEventType(str, Enum):
+    """Kinds of IdeaTask progress events."""
+
+    SNAPSHOT = "snapshot"
+    STATUS = "status"
+    SET_FIELDS = "set_fields"
+    IDEAS_APPENDED = "ideas_appended"
+    IDEA_UPDATED = "idea_updated"
+    SIMILAR_PAPERS_APPENDED = "similar_papers_appended"
+    FOLLOW_UP_QUESTIONS_APPENDED = "follow_up_questions_appended"
+
+
+class IdeaTaskEvent(BaseModel):
+    """A single ordered change to an IdeaTask."""
+
+    task_id: str = Field(description="Task identifier")
+    epoch: str = Field(description="Identifier of the encoder instance that produced the event")
+    seq: int = Field(description="Sequence number of the event, starting at 1")
+    type: IdeaTaskEventType = Field(description="Kind of change")
+    snapshot: Optional[IdeaTask] = Field(default=None, description="Full task for snapshot events")
+    status: Optional[str] = Field(default=None, description="New status for status events")
+    fields: Dict[str, Any] = Field(default_factory=dict, description="Replaced top-level task fields")
+    index: Optional[int] = Field(default=None, description="Position of the updated idea")
+    changes: Dict[str, Any] = Field(default_factory=dict, description="Changed keys of the updated idea")
+    ideas: List[Dict] = Field(default_factory=list, description="Appended ideas")
+    similar_papers: List[SimilarPaper] = Field(default_factory=list, description="Appended similar papers")
+    follow_up_questions: List[FollowUpQuestion] = Field(default_factory=list, description="Appended follow-up questions")
+
+
+class SequenceGapError(ValueError):
+    """Raised when an event arrives out of order and the client must resync."""
+
+    def __init__(self, expected: int, received: int, message: Optional[str] = None):
+        super().__init__(message or "Expected event %d, received %d" % (expected, received))
+        self.expected = expected
+        self.received = received
+
+
+def _is_prefix(prefix: List[Any], items: List[Any]) -> bool:
+    return len(prefix) <= len(items) and items[: len(prefix)] == prefix
+
+
+class IdeaTaskEventEncoder:
+    """Server-side encoder turning successive IdeaTask states into ordered delta events.
+
+    The most recent `history` events are kept so clients can resync from a sequence
+    number; older clients receive a fresh snapshot instead. Sequence numbers restart with
+    every encoder, so each encoder has its own epoch and positions are (epoch, seq) pairs.
+    """
+
+    def __init__(self, task_id: str, history: int = 256, epoch: Optional[str] = None):
+        self.task_id = task_id
+        self.epoch = epoch or str(uuid.uuid4())
+        self.seq = 0
+        self._state: Optional[Dict[str, Any]] = None
+        self._history: Deque[IdeaTaskEvent] = deque(maxlen=history)
+
+    def _event(self, event_type: IdeaTaskEventType, **payload: Any) -> IdeaTaskEvent:
+        self.seq += 1
+        event = IdeaTaskEvent(task_id=self.task_id, epoch=self.epoch, seq=self.seq, type=event_type, **payload)
+        self._history.append(event)
+        return event
+
+    def _diff_ideas(self, previous: List[Dict], current: List[Dict]) -> Optional[List[IdeaTaskEvent]]:
+        """Encode idea updates and appends, or return None if ideas were removed."""
+        if len(current) < len(previous):
+            return None
+        events = []
+        for index, (old, new) in enumerate(zip(previous, current)):
+            if old == new:
+                continue
+            if set(old) - set(new):
+                return None
+            changes = {key: value for key, value in new.items() if key not in old or old[key] != value}
+            events.append((IdeaTaskEventType.IDEA_UPDATED, {"index": index, "changes": changes}))
+        if len(current) > len(previous):
+            events.append((IdeaTaskEventType.IDEAS_APPENDED, {"ideas": current[len(previous):]}))
+        return [self._event(event_type, **payload) for event_type, payload in events]
+
+    def encode(self, task: IdeaTask) -> List[IdeaTaskEvent]:
+        """Return the events describing how the task changed since the last call."""
+        if task.task_id != self.task_id:
+            raise ValueError("Task %s does not belong to encoder for %s" % (task.task_id, self.task_id))
+        current = task.dict()
+        previous, self._state = self._state, current
+        if previous is None:
+            return [self._event(IdeaTaskEventType.SNAPSHOT, snapshot=IdeaTask.parse_obj(copy.deepcopy(current)))]
+
+        events = []
+        if current["status"] != previous["status"]:
+            events.append(self._event(IdeaTaskEventType.STATUS, status=current["status"]))
+
+        replaced = {}
+        old_ideas, new_ideas = previous["ideas"], current["ideas"]
+        if old_ideas != new_ideas:
+            idea_events = None
+            if old_ideas is not None and new_ideas is not None:
+                idea_events = self._diff_ideas(old_ideas, new_ideas)
+            if idea_events is None:
+                replaced["ideas"] = new_ideas
+            else:
+                events.extend(idea_events)
+
+        for name, event_type in (
+            ("similar_papers", IdeaTaskEventType.SIMILAR_PAPERS_APPENDED),
+            ("follow_up_questions", IdeaTaskEventType.FOLLOW_UP_QUESTIONS_APPENDED),
+        ):
+            old, new = previous[name], current[name]
+            if old == new:
+                continue
+            if old is not None and new is not None and _is_prefix(old, new):
+                events.append(self._event(event_type, **{name: new[len(old):]}))
+            else:
+                replaced[name] = new
+
+        for name, value in current.items():
+            if name in _APPEND_FIELDS or name == "status":
+                continue
+            if value != previous.get(name):
+                replaced[name] = value
+        if replaced:
+            events.append(self._event(IdeaTaskEventType.SET_FIELDS, fields=replaced))
+        return events
+
+    def snapshot(self) -> IdeaTaskEvent:
+        """Return a snapshot event of the current state without advancing the sequence."""
+        if self._state is None:
+            raise ValueError("No task has been encoded yet")
+        return IdeaTaskEvent(
+            task_id=self.task_id,
+            epoch=self.epoch,
+            seq=self.seq,
+            type=IdeaTaskEventType.SNAPSHOT,
+            snapshot=IdeaTask.parse_obj(copy.deepcopy(self._state)),
+        )
+
+    def events_since(self, seq: int, epoch: Optional[str] = None) -> List[IdeaTaskEvent]:
+        """Return the events after (`epoch`, `seq`), or a snapshot if they are not retained.
+
+        A position from another encoder (e.g. from before a backend restart) or from no
+        encoder at all gets a snapshot.
+        """
+        if epoch != self.epoch or seq > self.seq:
+            return [self.snapshot()]
+        if seq == self.seq:
+            return []
+        if seq > 0 and self._history and self._history[0].seq <= seq + 1:
+            return [event for event in self._history if event.seq > seq]
+        return [self.snapshot()]
+
+
+class IdeaTaskReducer:
+    """Client-side reducer rebuilding an IdeaTask from ordered delta events."""
+
+    def __init__(self):
+        self.task_id: Optional[str] = None
+        self.epoch: Optional[str] = None
+        self.seq = 0
+        self._state: Optional[Dict[str, Any]] = None
+
+    def apply(self, event: IdeaTaskEvent) -> bool:
+        """Apply an event. Returns False for already applied events.
+
+        Raises SequenceGapError if events were missed or come from another encoder epoch;
+        resync with the encoder's events_since(reducer.seq, reducer.epoch). A snapshot from
+        a new epoch replaces the state; within an epoch, snapshots at or behind the
+        reducer's seq are ignored as late duplicates.
+        """
+        if self.task_id is not None and event.task_id != self.task_id:
+            raise ValueError("Event for task %s applied to task %s" % (event.task_id, self.task_id))
+        new_epoch = event.epoch != self.epoch
+        if self._state is not None and not new_epoch and event.seq <= self.seq:
+            return False
+        if event.type == IdeaTaskEventType.SNAPSHOT:
+            self.task_id = event.task_id
+            self.epoch = event.epoch
+            self.seq = event.seq
+            self._state = event.snapshot.dict()
+            return True
+        if self._state is None:
+            raise SequenceGapError(1, event.seq)
+        if new_epoch:
+            raise SequenceGapError(
+                self.seq + 1,
+                event.seq,
+                "Event from encoder epoch %s, reducer is at epoch %s" % (event.epoch, self.epoch),
+            )
+        if event.seq != self.seq + 1:
+            raise SequenceGapError(self.seq + 1, event.seq)
+
+        state = self._state
+        if event.type == IdeaTaskEventType.STATUS:
+            state["status"] = event.status
+        elif event.type == IdeaTaskEventType.SET_FIELDS:
+            state.update(copy.deepcopy(event.fields))
+        elif event.type == IdeaTaskEventType.IDEA_UPDATED:
+            state["ideas"][event.index].update(copy.deepcopy(event.changes))
+        elif event.type == IdeaTaskEventType.IDEAS_APPENDED:
+            state["ideas"].extend(copy.deepcopy(event.ideas))
+        elif event.type == IdeaTaskEventType.SIMILAR_PAPERS_APPENDED:
+            state["similar_papers"].extend(paper.dict() for paper in event.similar_papers)
+        elif event.type == IdeaTaskEventType.FOLLOW_UP_QUESTIONS_APPENDED:
+            state["follow_up_questions"].extend(question.dict() for question in event.follow_up_questions)
+        self.seq = event.seq
+        return True
+
+    def apply_all(self, events: Iterable[IdeaTaskEvent]) -> None:
+        for event in events:
+            self.apply(event)
+
+    @property
+    def task(self) -> IdeaTask:
+        """Return the IdeaTask rebuilt from the events applied so far."""
+        if self._state is None:
+            raise ValueError("No snapshot has been applied yet")
+        return IdeaTask.parse_obj(copy.deepcopy(self._state))
@@ -0,0 +1,316 @@
+"""
+Normalized query keys and a TTL + LRU response cache for search endpoints.
+
+Usage:
+from schema_manager.query_cache import ResponseCache
+
+cache = ResponseCache(maxsize=1024, ttl=30.0)
+papers = cache.get_or_set(params, lambda: search_papers(params))
+...
+cache.invalidate_event(paper_update)  # on PaperCreate / PaperUpdate
+
+The generic SearchParams is not tied to a resource, so pass resource= for it:
+cache.get_or_set(params, lambda: search_ideas(params), resource="idea")
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from schema_manager.hashing import normalize_scalar
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Resource of each search model. Keyed on class name so this module does not import the
+# schema modules that depend on the app models.
+SEARCH_RESOURCES = {
+    "PaperSearchParams": "paper",
+    "ProjectSearchParams": "project",
+    "CodeSnippetSearchParams": "code_snippet",
+    "CreditSearchParams": "credit",
+}
+
+# Resource whose cached searches each write event affects
+EVENT_RESOURCES = {
+    # paper.py
+    "PaperCreate": "paper",
+    "PaperUpdate": "paper",
+    "CommentCreate": "paper",
+    # project.py
+    "ProjectCreate": "project",
+    "ProjectUpdate": "project",
+    "ProjectMemberUpdate": "project",
+    "ProjectContentUpdate": "project",
+    "ProjectCommentCreate": "project",
+    # code.py
+    "CodeSnippetCreate": "code_snippet",
+    "CodeSnippetUpdate": "code_snippet",
+    # credit.py
+    "CreditCreate": "credit",
+    "CreditPurchase": "credit",
+    "CreditUsage": "credit",
+}
+
+
+def _normalize_query_value(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = _WHITESPACE.sub(" ", value).strip()
+        if name == "sort_order":
+            value = value.lower()
+        return value or None
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted({_normalize_query_value(name, item) for item in value} - {None}, key=str)
+        return items or None
+    return normalize_scalar(value)
+
+
+def normalize_query(params: BaseModel) -> Dict[str, Any]:
+    """Return the normalized, non-default fields of a SearchParams model.
+
+    Whitespace in strings is collapsed, sort_order is lowercased, tags are de-duplicated
+    and sorted, empty values become None and values equal to the field default are dropped.
+    """
+    normalized = {}
+    for name, field in params.__fields__.items():
+        value = _normalize_query_value(name, getattr(params, name))
+        if value != _normalize_query_value(name, field.get_default()):
+            normalized[name] = value
+    return normalized
+
+
+def query_key(params: BaseModel) -> str:
+    """Return a canonical cache key for a SearchParams model.
+
+    Queries that mean the same thing (reordered tags, different sort_order casing,
+    defaults given explicitly) map to the same key.
+    """
+    return type(params).__name__ + ":" + json.dumps(normalize_query(params), sort_keys=True, separators=(",", ":"))
+
+
+def query_tags(params: BaseModel, resource: Optional[str] = None) -> FrozenSet[str]:
+    """Return the invalidation tags for a cached search response.
+
+    Every entry is tagged with its resource. Queries scoped to a user are also tagged
+    "<resource>:user:<user_id>", all other queries "<resource>:all".
+    """
+    resource = resource or SEARCH_RESOURCES.get(type(params).__name__)
+    if not resource:
+        raise ValueError("Unknown resource for %s, pass resource explicitly" % type(params).__name__)
+    user_id = getattr(params, "user_id", None)
+    scope = "%s:user:%s" % (resource, user_id) if user_id else "%s:all" % resource
+    return frozenset({resource, scope})
+
+
+def event_tags(event: BaseModel, resource: Optional[str] = None) -> FrozenSet[str]:
+    """Return the tags invalidated by a write event listed in EVENT_RESOURCES.
+
+    Events that carry a user_id only invalidate that user's queries and unscoped ones,
+    other events invalidate every query on the resource.
+    """
+    resource = resource or EVENT_RESOURCES.get(type(event).__name__)
+    if not resource:
+        raise ValueError("Unknown resource for event %s, pass resource explicitly" % type(event).__name__)
+    user_id = getattr(event, "user_id", None)
+    if user_id:
+        return frozenset({"%s:user:%s" % (resource, user_id), "%s:all" % resource})
+    return frozenset({resource})
+
+
+class CacheStats(BaseModel):
+    """Response cache statistics."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache of search responses keyed on normalized queries."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (expires_at, tags, value)
+        self._entries: "OrderedDict[str, Tuple[float, FrozenSet[str], Any]]" = OrderedDict()
+        self._keys_by_tag: Dict[str, set] = {}
+        # Bumped on every invalidation and clear. get_or_set records the generation before
+        # calling factory() and skips storing the result if one of its tags was invalidated
+        # after that point. Invalidated tags are only remembered while a get_or_set call
+        # that started before the invalidation is still running.
+        self._generation = 0
+        self._cleared_at = 0
+        self._inflight: Dict[int, int] = {}
+        self._invalidated: Dict[str, int] = {}
+        # Lower bound on the earliest expiry of any entry
+        self._next_expiry = float("inf")
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def _remove(self, key: str) -> None:
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if entry[0] <= now]
+        for key in expired:
+            self._remove(key)
+        self._stats.expirations += len(expired)
+        self._next_expiry = min((entry[0] for entry in self._entries.values()), default=float("inf"))
+
+    def _is_stale(self, entry_tags: FrozenSet[str], generation: int) -> bool:
+        if self._cleared_at > generation:
+            return True
+        return any(self._invalidated.get(tag, 0) > generation for tag in entry_tags)
+
+    def _release(self, generation: int) -> None:
+        remaining = self._inflight[generation] - 1
+        if remaining:
+            self._inflight[generation] = remaining
+            return
+        del self._inflight[generation]
+        if not self._inflight:
+            self._invalidated.clear()
+        else:
+            oldest = min(self._inflight)
+            self._invalidated = {tag: value for tag, value in self._invalidated.items() if value > oldest}
+
+    def _store(
+        self,
+        key: str,
+        entry_tags: FrozenSet[str],
+        value: Any,
+        ttl: Optional[float],
+        generation: Optional[int] = None,
+    ) -> bool:
+        now = self._clock()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and self._is_stale(entry_tags, generation):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, entry_tags, value)
+            for tag in entry_tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            self._next_expiry = min(self._next_expiry, expires_at)
+            if len(self._entries) > self.maxsize and self._next_expiry <= now:
+                self._purge_expired(now)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+            return True
+
+    def get(self, params: BaseModel, default: Any = None) -> Any:
+        """Return the cached response for a query, or default on a miss."""
+        key = query_key(params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                self._remove(key)
+                self._stats.expirations += 1
+                entry = None
+            if entry is None:
+                self._stats.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry[2]
+
+    def set(
+        self,
+        params: BaseModel,
+        value: Any,
+        resource: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Cache a response for a query, tagged for invalidation."""
+        self._store(query_key(params), query_tags(params, resource) | frozenset(tags or ()), value, ttl)
+
+    def get_or_set(
+        self,
+        params: BaseModel,
+        factory: Callable[[], Any],
+        resource: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Return the cached response for a query, computing and caching it on a miss.
+
+        The computed response is not cached if one of its tags was invalidated, or the
+        cache was cleared, while factory() was running.
+        """
+        entry_tags = query_tags(params, resource) | frozenset(tags or ())
+        missing = object()
+        value = self.get(params, missing)
+        if value is missing:
+            with self._lock:
+                generation = self._generation
+                self._inflight[generation] = self._inflight.get(generation, 0) + 1
+            try:
+                value = factory()
+                self._store(query_key(params), entry_tags, value, ttl, generation)
+            finally:
+                with self._lock:
+                    self._release(generation)
+        return value
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Drop every entry carrying any of the given tags and return how many were dropped."""
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for tag in tags:
+                keys |= self._keys_by_tag.get(tag, set())
+                if self._inflight:
+                    self._invalidated[tag] = self._generation
+            for key in keys:
+                self._remove(key)
+            self._stats.invalidations += len(keys)
+            return len(keys)
+
+    def invalidate_event(self, event: BaseModel, resource: Optional[str] = None) -> int:
+        """Drop the entries affected by a write event listed in EVENT_RESOURCES."""
+        return self.invalidate_tags(*event_tags(event, resource))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cleared_at = self._generation
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self._next_expiry = float("inf")
+
+    @property
+    def stats(self) -> CacheStats:
+        """Return a snapshot of the cache statistics."""
+        with self._lock:
+            return self._stats.copy(update={"size": len(self._entries)})
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from schema_manager.hashing import HashCache, VOLATILE_FIELDS, canonical_json, content_hash, etag_matches, make_etag
+from schema_manager.idea import IdeaTask, SimilarPaper
+
+
+def make_paper(**overrides):
+    data = dict(title="Paper", source="arXiv", source_url="https://arxiv.org/abs/1", semantic_similarity=0.3)
+    data.update(overrides)
+    return SimilarPaper(**data)
+
+
+def make_task(**overrides):
+    data = dict(
+        id="task-1",
+        task_id="task-1",
+        task_description="Find ideas",
+        num_ideas=2,
+        status="running",
+        created_at=datetime(2024, 1, 1, 12),
+        updated_at=datetime(2024, 1, 1, 12),
+        similar_papers=[make_paper(), make_paper(title="Other")],
+    )
+    data.update(overrides)
+    return IdeaTask(**data)
+
+
+def test_hash_stable_across_timezones():
+    utc = make_task(updated_at=datetime(2024, 1, 1, 12, tzinfo=timezone.utc))
+    cet = make_task(updated_at=datetime(2024, 1, 1, 13, tzinfo=timezone(timedelta(hours=1))))
+    assert content_hash(make_task()) == content_hash(utc) == content_hash(cet)
+
+
+def test_hash_stable_across_key_order():
+    first = make_task(metadata={"a": 1, "b": {"x": 1, "y": 2}})
+    second = make_task(metadata={"b": {"y": 2, "x": 1}, "a": 1})
+    assert canonical_json(first) == canonical_json(second)
+    assert content_hash(first) == content_hash(second)
+
+
+def test_hash_stable_across_float_noise():
+    noisy = make_task(similar_papers=[make_paper(semantic_similarity=0.1 + 0.2), make_paper(title="Other")])
+    assert content_hash(noisy) == content_hash(make_task())
+
+
+def test_hash_changes_on_nested_mutation():
+    task = make_task()
+    before = content_hash(task)
+    task.similar_papers[0].authors.append("Ada")
+    assert content_hash(task) != before
+    task.similar_papers[0].authors.pop()
+    assert content_hash(task) == before
+
+
+def test_non_finite_floats_are_rejected():
+    with pytest.raises(ValueError):
+        content_hash(make_task(similar_papers=[make_paper(semantic_similarity=float("nan"))]))
+
+
+def test_excluded_fields_do_not_affect_hash():
+    assert content_hash(make_task(metadata={"views": 1}), exclude=["metadata"]) == content_hash(
+        make_task(metadata={"views": 2}), exclude=["metadata"]
+    )
+
+
+def test_etag_matches():
+    etag = make_etag(make_task())
+    assert etag_matches(etag, etag)
+    assert etag_matches('"other", W/' + etag, etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+    assert make_etag(make_task(), weak=True) == "W/" + etag
+
+
+def test_hash_cache_reuses_hash_for_reloaded_model(monkeypatch):
+    cache = HashCache()
+    task = make_task()
+    expected = content_hash(task, VOLATILE_FIELDS)
+    assert cache.content_hash(task, VOLATILE_FIELDS) == expected
+
+    calls = []
+    monkeypatch.setattr("schema_manager.hashing.content_hash", lambda *args: calls.append(args))
+    reloaded = IdeaTask.parse_obj(task.dict())
+    assert cache.content_hash(reloaded, VOLATILE_FIELDS) == expected
+    assert calls == []
+
+
+def test_hash_cache_misses_on_new_version():
+    cache = HashCache()
+    task = make_task()
+    cache.content_hash(task)
+    updated = make_task(status="done", updated_at=datetime(2024, 1, 1, 13))
+    assert cache.content_hash(updated) == content_hash(updated)
+    assert len(cache) == 2
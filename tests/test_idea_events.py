@@ -0,0 +1,144 @@
+from datetime import datetime
+
+import pytest
+
+from schema_manager.idea import FollowUpQuestion, IdeaTask, SimilarPaper
+from schema_manager.idea_events import (
+    IdeaTaskEvent,
+    IdeaTaskEventEncoder,
+    IdeaTaskEventType,
+    IdeaTaskReducer,
+    SequenceGapError,
+)
+
+
+def over_the_wire(events):
+    return [IdeaTaskEvent.parse_raw(event.json()) for event in events]
+
+
+def make_task():
+    return IdeaTask(task_id="task-1", task_description="Find ideas", num_ideas=3, status="pending")
+
+
+def make_paper(title):
+    return SimilarPaper(title=title, source="arXiv", source_url="https://arxiv.org/abs/1", semantic_similarity=0.5)
+
+
+def progress(task):
+    """Yield the task after each generation step."""
+    task.status = "running"
+    task.ideas.append({"name": "a", "novelty": {"score": 0.0, "justification": ""}})
+    yield task
+    task.ideas[0]["novelty"] = {"score": 7.5, "justification": "New angle"}
+    task.ideas.append({"name": "b"})
+    task.similar_papers.append(make_paper("Related"))
+    yield task
+    task.follow_up_questions.append(FollowUpQuestion(question="Which dataset?", answer="ImageNet"))
+    task.thought = "Refine"
+    task.updated_at = datetime(2024, 1, 2)
+    yield task
+    task.ideas.pop()
+    task.reflection_rounds = 1
+    task.status = "completed"
+    yield task
+
+
+def test_round_trip_rebuilds_identical_task():
+    task = make_task()
+    encoder = IdeaTaskEventEncoder(task.task_id)
+    reducer = IdeaTaskReducer()
+    reducer.apply_all(over_the_wire(encoder.encode(task)))
+    assert reducer.task == task
+    for step in progress(task):
+        reducer.apply_all(over_the_wire(encoder.encode(step)))
+        assert reducer.task == task
+    assert reducer.seq == encoder.seq
+
+
+def test_deltas_carry_only_changes():
+    task = make_task()
+    encoder = IdeaTaskEventEncoder(task.task_id)
+    encoder.encode(task)
+    steps = progress(task)
+    encoder.encode(next(steps))
+    events = encoder.encode(next(steps))
+    assert [event.type for event in events] == [
+        IdeaTaskEventType.IDEA_UPDATED,
+        IdeaTaskEventType.IDEAS_APPENDED,
+        IdeaTaskEventType.SIMILAR_PAPERS_APPENDED,
+    ]
+    assert events[0].changes == {"novelty": {"score": 7.5, "justification": "New angle"}}
+    assert encoder.encode(task) == []
+
+
+def test_gap_detected_and_resynced():
+    task = make_task()
+    encoder = IdeaTaskEventEncoder(task.task_id)
+    reducer = IdeaTaskReducer()
+    reducer.apply_all(encoder.encode(task))
+    steps = progress(task)
+    next(steps)
+    encoder.encode(task)
+    missed_to = encoder.encode(next(steps))
+    with pytest.raises(SequenceGapError):
+        reducer.apply(missed_to[-1])
+    reducer.apply_all(encoder.events_since(reducer.seq, reducer.epoch))
+    assert reducer.task == task
+
+
+def test_duplicate_and_late_snapshot_ignored():
+    task = make_task()
+    encoder = IdeaTaskEventEncoder(task.task_id)
+    reducer = IdeaTaskReducer()
+    first = encoder.encode(task)
+    reducer.apply_all(first)
+    for step in progress(task):
+        reducer.apply_all(encoder.encode(step))
+    seq = reducer.seq
+    assert reducer.apply(first[0]) is False
+    assert reducer.seq == seq
+    assert reducer.task == task
+
+
+def test_resync_after_encoder_restart():
+    task = make_task()
+    old_encoder = IdeaTaskEventEncoder(task.task_id)
+    reducer = IdeaTaskReducer()
+    reducer.apply_all(old_encoder.encode(task))
+    steps = progress(task)
+    reducer.apply_all(old_encoder.encode(next(steps)))
+
+    # The backend restarts and a new encoder catches up to the same seq with other content
+    new_encoder = IdeaTaskEventEncoder(task.task_id)
+    task.ideas.append({"name": "after-restart"})
+    new_encoder.encode(task)
+    task.status = "restarted"
+    new_encoder.encode(task)
+    while new_encoder.seq < reducer.seq:
+        task.thought = str(new_encoder.seq)
+        new_encoder.encode(task)
+    assert new_encoder.seq == reducer.seq
+
+    task.ideas.append({"name": "x"})
+    with pytest.raises(SequenceGapError):
+        reducer.apply_all(new_encoder.encode(task))
+    reducer.apply_all(over_the_wire(new_encoder.events_since(reducer.seq, reducer.epoch)))
+    assert reducer.epoch == new_encoder.epoch
+    assert reducer.task == task
+
+
+def test_events_since_client_ahead_gets_snapshot():
+    task = make_task()
+    encoder = IdeaTaskEventEncoder(task.task_id)
+    encoder.encode(task)
+    events = encoder.events_since(10, encoder.epoch)
+    assert [event.type for event in events] == [IdeaTaskEventType.SNAPSHOT]
+    assert encoder.events_since(encoder.seq, encoder.epoch) == []
+
+
+def test_event_for_other_task_rejected():
+    reducer = IdeaTaskReducer()
+    reducer.apply_all(IdeaTaskEventEncoder("task-1").encode(make_task()))
+    other = IdeaTask(task_id="task-2", task_description="Other", num_ideas=1)
+    with pytest.raises(ValueError):
+        reducer.apply_all(IdeaTaskEventEncoder("task-2").encode(other))
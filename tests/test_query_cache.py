@@ -0,0 +1,162 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from schema_manager.common import SearchParams
+from schema_manager.credit import CreditCreate, CreditSearchParams, CreditUsage
+from schema_manager.query_cache import ResponseCache, query_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def credit_create(user_id):
+    return CreditCreate(amount=10, description="Top up", transaction_type="purchase", user_id=user_id, balance=10)
+
+
+def test_equivalent_queries_share_key():
+    assert query_key(SearchParams(tags=["b", "a", " a"], sort_order="DESC", limit=10, page=1)) == query_key(
+        SearchParams(tags=["a", "b"])
+    )
+    assert query_key(SearchParams(query="  graph   neural nets ")) == query_key(SearchParams(query="graph neural nets"))
+    assert query_key(SearchParams(tags=[])) == query_key(SearchParams())
+
+
+def test_different_queries_have_different_keys():
+    assert query_key(SearchParams(tags=["a"])) != query_key(SearchParams(tags=["b"]))
+    assert query_key(SearchParams(sort_order="asc")) != query_key(SearchParams())
+    assert query_key(CreditSearchParams()) != query_key(SearchParams())
+
+
+def test_datetimes_normalized_in_key():
+    utc = CreditSearchParams(start_date=datetime(2024, 1, 1, 12, tzinfo=timezone.utc))
+    cet = CreditSearchParams(start_date=datetime(2024, 1, 1, 13, tzinfo=timezone(timedelta(hours=1))))
+    assert query_key(utc) == query_key(cet)
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=5, clock=clock)
+    cache.set(CreditSearchParams(), "page")
+    clock.now = 4
+    assert cache.get(CreditSearchParams()) == "page"
+    clock.now = 5
+    assert cache.get(CreditSearchParams()) is None
+    assert cache.stats.expirations == 1
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    cache.set(CreditSearchParams(user_id="a"), "a")
+    cache.set(CreditSearchParams(user_id="b"), "b")
+    cache.get(CreditSearchParams(user_id="a"))
+    cache.set(CreditSearchParams(user_id="c"), "c")
+    assert cache.get(CreditSearchParams(user_id="b")) is None
+    assert cache.get(CreditSearchParams(user_id="a")) == "a"
+    assert cache.stats.evictions == 1
+
+
+def test_expired_entries_purged_before_eviction():
+    clock = FakeClock()
+    cache = ResponseCache(maxsize=2, ttl=5, clock=clock)
+    cache.set(CreditSearchParams(user_id="a"), "a")
+    cache.set(CreditSearchParams(user_id="b"), "b")
+    clock.now = 10
+    cache.set(CreditSearchParams(user_id="c"), "c")
+    stats = cache.stats
+    assert (stats.expirations, stats.evictions, stats.size) == (2, 0, 1)
+
+
+def test_user_scoped_event_invalidation():
+    cache = ResponseCache()
+    cache.set(CreditSearchParams(user_id="u1"), "u1")
+    cache.set(CreditSearchParams(user_id="u2"), "u2")
+    cache.set(CreditSearchParams(), "all")
+    assert cache.invalidate_event(credit_create("u1")) == 2
+    assert cache.get(CreditSearchParams(user_id="u2")) == "u2"
+    assert cache.get(CreditSearchParams()) is None
+
+
+def test_unscoped_event_invalidates_resource():
+    cache = ResponseCache()
+    cache.set(CreditSearchParams(user_id="u1"), "u1")
+    cache.set(CreditSearchParams(), "all")
+    cache.set(SearchParams(), "ideas", resource="idea")
+    assert cache.invalidate_event(CreditUsage(amount=1, description="Generate")) == 2
+    assert cache.get(SearchParams()) == "ideas"
+
+
+def test_unknown_resources_raise():
+    cache = ResponseCache()
+    with pytest.raises(ValueError):
+        cache.invalidate_event(SearchParams())
+    calls = []
+    with pytest.raises(ValueError):
+        cache.get_or_set(SearchParams(), lambda: calls.append(1))
+    assert calls == []
+
+
+def test_stale_write_skipped_on_concurrent_invalidation():
+    cache = ResponseCache()
+    started, invalidated = threading.Event(), threading.Event()
+    results = []
+
+    def factory():
+        started.set()
+        invalidated.wait(5)
+        return "stale"
+
+    worker = threading.Thread(target=lambda: results.append(cache.get_or_set(CreditSearchParams(), factory)))
+    worker.start()
+    started.wait(5)
+    cache.invalidate_event(credit_create("u1"))
+    invalidated.set()
+    worker.join(5)
+
+    assert results == ["stale"]
+    assert cache.get(CreditSearchParams()) is None
+    assert cache.get_or_set(CreditSearchParams(), lambda: "fresh") == "fresh"
+    assert cache.get(CreditSearchParams()) == "fresh"
+
+
+def test_unrelated_invalidation_does_not_skip_write():
+    cache = ResponseCache()
+
+    def factory():
+        cache.invalidate_event(credit_create("u2"))
+        return "page"
+
+    cache.get_or_set(CreditSearchParams(user_id="u1"), factory)
+    assert cache.get(CreditSearchParams(user_id="u1")) == "page"
+
+
+def test_clear_during_factory_skips_write():
+    cache = ResponseCache()
+
+    def factory():
+        cache.clear()
+        return "stale"
+
+    assert cache.get_or_set(CreditSearchParams(), factory) == "stale"
+    assert cache.get(CreditSearchParams()) is None
+
+
+def test_invalidation_bookkeeping_is_bounded():
+    cache = ResponseCache()
+
+    def factory():
+        for index in range(1000):
+            cache.invalidate_event(credit_create("user-%d" % index))
+        return "page"
+
+    cache.get_or_set(CreditSearchParams(), factory)
+    for index in range(1000):
+        cache.invalidate_event(credit_create("user-%d" % index))
+    assert cache._invalidated == {}
+    assert cache._inflight == {}